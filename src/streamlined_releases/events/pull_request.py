@@ -1,9 +1,12 @@
 import re
+import tempfile
 from logging import getLogger
+from pathlib import Path
 
 from github import GithubException
 
-from ..services import get_gitcliff_changelog_diff
+from ..services import (GITHUB_RELEASE_BODY_MAX_LENGTH, build_changelog_body, ensure_commit_graph,
+                        get_gitcliff_changelog_diff)
 from ..settings import app_settings
 
 logger = getLogger(__name__)
@@ -35,21 +38,59 @@ def on_pull_request_merged(version: str):
             raise
 
     if release is None:
-        logger.info('Generating changelog diff for release body')
-        body = get_gitcliff_changelog_diff(
-            bump=True,
-            unreleased=True,
-            strip='header',
-        )
-
-        logger.info("Creating release '%s' from '%s'", version, app_settings.github.head_ref)
-        release = repo.create_git_tag_and_release(
-            tag=version,
-            tag_message=version,
-            release_name=version,
-            release_message=body,
-            object=app_settings.github.sha,
-            type='commit',
-        )
+        ensure_commit_graph()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # per-package versions such as 'pkg-a/v1.2.0' would otherwise point into a missing subdirectory
+            changelog_filepath = Path(tmpdir) / f"CHANGELOG-{version.replace('/', '-')}.md"
+
+            logger.info('Generating changelog diff for release body')
+            get_gitcliff_changelog_diff(
+                bump=True,
+                unreleased=True,
+                strip='header',
+                output_filepath=changelog_filepath,
+            )
+
+            # the asset url is deterministic, so it can be linked before the release exists
+            asset_url = (
+                f'{app_settings.github.server_url}/{app_settings.github.repository}'
+                f'/releases/download/{version}/{changelog_filepath.name}'
+            )
+            body, truncated = build_changelog_body(
+                changelog_filepath=changelog_filepath,
+                max_length=GITHUB_RELEASE_BODY_MAX_LENGTH,
+                full_changelog_url=asset_url,
+            )
+
+            logger.info("Creating release '%s' from '%s'", version, app_settings.github.head_ref)
+            release = repo.create_git_tag_and_release(
+                tag=version,
+                tag_message=version,
+                release_name=version,
+                release_message=body,
+                object=app_settings.github.sha,
+                type='commit',
+            )
+
+            if truncated:
+                try:
+                    # streamed from disk by the client, the full changelog is never loaded into memory
+                    logger.info("Uploading full changelog as release asset '%s'", changelog_filepath.name)
+                    release.upload_asset(
+                        path=changelog_filepath.as_posix(),
+                        label='Full Changelog',
+                        content_type='text/markdown',
+                        name=changelog_filepath.name,
+                    )
+
+                except (GithubException, OSError):
+                    # the release is already published, don't fail the run over its asset
+                    logger.exception("Failed to upload release asset '%s', removing its link", changelog_filepath.name)
+                    body, _truncated = build_changelog_body(
+                        changelog_filepath=changelog_filepath,
+                        max_length=GITHUB_RELEASE_BODY_MAX_LENGTH,
+                    )
+                    release.update_release(name=version, message=body)
 
     return release
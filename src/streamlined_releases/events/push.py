@@ -1,11 +1,15 @@
 import re
+import tempfile
 from logging import getLogger
+from pathlib import Path
+from typing import Optional
 
 import git
 
-from ..services import (bump_version, create_pull_request, get_gitcliff_bumped_version, get_gitcliff_changelog_diff,
-                        upsert_branch)
-from ..settings import app_settings
+from ..services import (GITHUB_PULL_REQUEST_BODY_MAX_LENGTH, TagEntry, build_changelog_body, bump_version,
+                        create_pull_request, ensure_commit_graph, get_gitcliff_bumped_version,
+                        get_gitcliff_changelog_diff, get_tag_index, iter_commits, upsert_branch)
+from ..settings import GithubEnv, app_settings
 
 logger = getLogger(__name__)
 
@@ -14,12 +18,39 @@ __all__ = [
 ]
 
 
-def on_push():
-    gh = app_settings.github.get_client()
-    gh_repo = gh.get_repo(app_settings.github.repository)
-    bumped_version = get_gitcliff_bumped_version()
-    rc_branch_name = f'rc/{bumped_version}-{app_settings.github.ref_name}'
-    rc_branch_template = re.compile(rf'^rc/(?P<version>.+)-{app_settings.github.ref_name}$')
+def on_push(github_env: Optional[GithubEnv] = None):
+    """
+    Create or refresh the release candidate pull request for the pushed release branch.
+
+    `github_env` defaults to the action's environment, and is given explicitly when sweeping other repositories.
+    """
+
+    github_env = github_env or app_settings.github
+    ensure_commit_graph(github_env=github_env)
+    bumped_version = get_gitcliff_bumped_version(github_env=github_env)
+
+    # only consider releases sharing the bumped version's prefix, i.e. 'v' and not a sibling package's 'pkg-b/v'.
+    # the walk goes back only as far as that release, stopping at the first unreleased commit
+    if (bumped_tag := TagEntry.parse(bumped_version, sha='')) is not None:
+        last_release = get_tag_index(github_env=github_env).nearest_release(
+            prefix=bumped_tag.prefix,
+            github_env=github_env,
+        )
+        # bump commits alone (i.e. brought back by merging a release) don't make a new release
+        if last_release and not any(
+            commit.author_email != app_settings.bump_commit_actor.email
+            for commit in iter_commits(stop_at=last_release.sha, github_env=github_env)
+        ):
+            logger.info(
+                "No commits since release '%s' on '%s', nothing to release",
+                last_release.name, github_env.ref_name,
+            )
+            return None
+
+    gh = github_env.get_client()
+    gh_repo = gh.get_repo(github_env.repository)
+    rc_branch_name = f'rc/{bumped_version}-{github_env.ref_name}'
+    rc_branch_template = re.compile(rf'^rc/(?P<version>.+)-{github_env.ref_name}$')
 
     logger.info("Bumped version: '%s'", bumped_version)
 
@@ -43,17 +74,32 @@ def on_push():
         rc_pr.edit(state='closed')
         rc_pr = None
 
-    logger.info('Generating changelog diff for pull request body')
-    body = get_gitcliff_changelog_diff(
-        bump=True,
-        unreleased=True,
-        strip='header',
-        prepend=False,
-    )
-
-    # replace 'bumped_version' to 'rc_branch_name' in the comparison url as the bumped version tag is not yet created
-    # i.e replace 'v1.0.0...v1.0.1' with 'v1.0.0...rc/v1.0.1-dev'
-    body = body.replace(f'...{bumped_version}', f'...{rc_branch_name}')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        changelog_filepath = Path(tmpdir) / 'CHANGELOG.md'
+
+        logger.info('Generating changelog diff for pull request body')
+        get_gitcliff_changelog_diff(
+            bump=True,
+            unreleased=True,
+            strip='header',
+            prepend=False,
+            output_filepath=changelog_filepath,
+            github_env=github_env,
+        )
+
+        # replace 'bumped_version' to 'rc_branch_name' in the comparison url,
+        # as the bumped version tag is not yet created
+        # i.e replace 'v1.0.0...v1.0.1' with 'v1.0.0...rc/v1.0.1-dev'
+        body, _truncated = build_changelog_body(
+            changelog_filepath=changelog_filepath,
+            max_length=GITHUB_PULL_REQUEST_BODY_MAX_LENGTH,
+            full_changelog_url=(
+                f'{github_env.server_url}/{github_env.repository}'
+                f'/blob/{rc_branch_name}/{app_settings.changelog_filepath.as_posix()}'
+            ),
+            transform=lambda section: section.replace(f'...{bumped_version}', f'...{rc_branch_name}'),
+        )
+
     logger.debug('Pull request body:\n%s', body)
 
     if rc_pr is None:
@@ -62,8 +108,9 @@ def on_push():
 
         # create the release candidate branch if it doesn't exist
         upsert_branch(
-            branch_name=f'rc/{bumped_version}-{app_settings.github.ref_name}',
-            base_ref=app_settings.github.ref_name,
+            branch_name=f'rc/{bumped_version}-{github_env.ref_name}',
+            base_ref=github_env.ref_name,
+            github_env=github_env,
         )
 
         # add bumped version to the branch
@@ -71,14 +118,16 @@ def on_push():
             version=bumped_version,
             target_ref=rc_branch_name,
             do_commit=True,
+            github_env=github_env,
         )
 
         # create the initial pull request
         rc_pr = create_pull_request(
             head_ref=rc_branch_name,
-            base_ref=app_settings.github.ref_name,
-            title=f'[Release Candidate] {bumped_version}-{app_settings.github.ref_name} 🚀',
+            base_ref=github_env.ref_name,
+            title=f'[Release Candidate] {bumped_version}-{github_env.ref_name} 🚀',
             body=body,
+            github_env=github_env,
         )
 
     else:
@@ -86,9 +135,9 @@ def on_push():
         logger.info('Updating pull request (#%s) with new changes', rc_pr.number)
 
         # move RC branch head to the latest commit on the base branch
-        repo = git.Repo(app_settings.github.workspace)
+        repo = git.Repo(github_env.workspace)
         repo.git.checkout(rc_branch_name)
-        repo.git.reset('--hard', app_settings.github.sha)
+        repo.git.reset('--hard', github_env.sha)
 
         # add bumped version to the branch
         bump_version(
@@ -96,10 +145,13 @@ def on_push():
             target_ref=rc_branch_name,
             do_commit=True,
             commit_force=True,
+            github_env=github_env,
         )
 
         # update the pull request with the new changes
         rc_pr.edit(
-            title=f'[Release Candidate] {bumped_version}-{app_settings.github.ref_name} 🚀',
+            title=f'[Release Candidate] {bumped_version}-{github_env.ref_name} 🚀',
             body=body,
         )
+
+    return rc_pr
@@ -0,0 +1,315 @@
+"""
+Sweep many repositories at once, running the `on_push` flow for each of their release branches.
+
+Usage:
+  python -m streamlined_releases.fleet owner/repo-a owner/repo-b --branches dev stg
+  python -m streamlined_releases.fleet --repos-file repos.txt --workers 8
+"""
+
+import argparse
+import base64
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import Literal, Optional
+from urllib.parse import urlparse
+
+import git
+from github import Auth, Github
+
+from .events import on_push
+from .services import is_rc_commit
+from .settings import app_settings
+from .utils import setup_logging
+
+logger = getLogger(__name__)
+
+DEFAULT_CACHE_DIR = app_settings.data_dir / 'fleet'
+
+__all__ = [
+    "BranchResult",
+    "RateLimitBudget",
+    "main",
+    "sweep_repositories",
+]
+
+
+@dataclass
+class BranchResult:
+    repository: str
+    branch: str
+    status: Literal['updated', 'skipped', 'failed']
+    detail: str = ''
+
+
+@contextmanager
+def git_auth_environment(url_prefix: str, token: str):
+    """
+    Authenticate every git process started by this process against `url_prefix`,
+    passing the header through the environment so it is never written to any git config.
+    """
+
+    credentials = base64.b64encode(f'x-access-token:{token}'.encode()).decode()
+    index = int(os.environ.get('GIT_CONFIG_COUNT', 0))
+    overrides = {
+        'GIT_CONFIG_COUNT': str(index + 1),
+        f'GIT_CONFIG_KEY_{index}': f'http.{url_prefix}.extraheader',
+        f'GIT_CONFIG_VALUE_{index}': f'AUTHORIZATION: basic {credentials}',
+    }
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+
+    try:
+        yield
+
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class RateLimitBudget:
+    """
+    Rate limit budget shared by all workers, pausing everyone once the remaining requests drop to `reserve`.
+
+    Checked every time a worker gets the shared client from its `GithubEnv`, that is once at the start of
+    `on_push`, `create_pull_request` and `is_rc_commit`. The requests made after that (i.e. paging through
+    pull requests) are not checked, PyGithub's default `GithubRetry` only waits out rate limited responses.
+    """
+
+    def __init__(self, client: Github, reserve: int):
+        self.client = client
+        self.reserve = reserve
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            remaining, limit = self.client.rate_limiting
+
+            if remaining > self.reserve:
+                return
+
+            wait_seconds = max(self.client.rate_limiting_resettime - time.time(), 0) + 1
+            logger.warning(
+                'Rate limit budget exhausted (%s/%s remaining), pausing all workers for %ds',
+                remaining, limit, wait_seconds,
+            )
+            time.sleep(wait_seconds)
+
+
+@dataclass
+class FleetSweep:
+    client: Github
+    budget: RateLimitBudget
+    branches: list[str]
+    cache_dir: Path
+    results: list[BranchResult] = field(default_factory=list)
+    _results_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _record(self, result: BranchResult):
+        with self._results_lock:
+            self.results.append(result)
+
+        logger.info('[%s@%s] %s %s', result.repository, result.branch, result.status, result.detail)
+
+    def _sync_clone(self, repository: str, workspace: Path):
+        """Reuse the cached partial clone of `repository` if present, otherwise create it"""
+
+        server = urlparse(app_settings.github.server_url)
+        remote_url = f'{server.scheme}://{server.netloc}/{repository}.git'
+
+        if (workspace / '.git').exists():
+            logger.debug("Reusing cached clone of '%s' at '%s'", repository, workspace)
+            repo = git.Repo(workspace)
+        else:
+            logger.info("Creating partial clone of '%s' at '%s'", repository, workspace)
+            workspace.mkdir(parents=True, exist_ok=True)
+            repo = git.Repo.init(workspace)
+            repo.create_remote('origin', remote_url)
+            repo.git.config('remote.origin.promisor', 'true')
+            repo.git.config('remote.origin.partialclonefilter', 'blob:none')
+
+        repo.git.fetch('origin', '--prune', '--prune-tags', '--tags', '--force', '--filter=blob:none')
+        return repo
+
+    def _checkout(self, repo: git.Repo, branch: str):
+        """Mirror a fresh action checkout of `branch`, dropping local branches left over from previous sweeps"""
+
+        if repo.head.is_valid():
+            repo.git.reset('--hard')
+            repo.git.clean('-fdx')
+        repo.git.checkout('-B', branch, f'origin/{branch}')
+
+        for head in repo.heads:
+            if head.name != branch:
+                repo.delete_head(head, force=True)
+
+        return repo.head.commit.hexsha
+
+    def sweep_repository(self, repository: str):
+        workspace = self.cache_dir.joinpath(*repository.split('/'))
+
+        try:
+            repo = self._sync_clone(repository, workspace)
+        except Exception as exc:
+            logger.exception("Failed to sync clone of '%s'", repository)
+            for branch in self.branches:
+                self._record(BranchResult(repository, branch, 'failed', f'clone failed: {exc!r}'))
+            return
+
+        remote_branches = {ref.remote_head for ref in repo.remote('origin').refs}
+
+        for branch in self.branches:
+            if branch not in remote_branches:
+                self._record(BranchResult(repository, branch, 'skipped', 'branch does not exist'))
+                continue
+
+            try:
+                sha = self._checkout(repo, branch)
+                github_env = app_settings.github.with_client(
+                    self.client,
+                    on_get_client=self.budget.acquire,
+                    repository=repository,
+                    ref_name=branch,
+                    ref=f'refs/heads/{branch}',
+                    sha=sha,
+                    workspace=workspace,
+                )
+
+                if is_rc_commit(sha, github_env=github_env):
+                    self._record(BranchResult(repository, branch, 'skipped', f'head {sha[:7]} is an rc merge commit'))
+                    continue
+
+                rc_pr = on_push(github_env=github_env)
+                if rc_pr is None:
+                    self._record(BranchResult(repository, branch, 'skipped', 'nothing to release'))
+                    continue
+
+                self._record(BranchResult(repository, branch, 'updated', f'#{rc_pr.number} {rc_pr.html_url}'))
+
+            except Exception as exc:
+                logger.exception("Failed to sweep '%s' on branch '%s'", repository, branch)
+                self._record(BranchResult(repository, branch, 'failed', repr(exc)))
+
+
+def sweep_repositories(repositories: list[str],
+                       branches: Optional[list[str]] = None,
+                       workers: int = 4,
+                       cache_dir: Path = DEFAULT_CACHE_DIR,
+                       rate_limit_reserve: int = 100):
+    """
+    Run the `on_push` flow for every release branch of every repository in `repositories`.
+
+    Repositories are processed concurrently by a pool of `workers`, branches of the same repository
+    are processed sequentially as they share a working tree.
+    All workers share a single pooled API client and its rate limit budget.
+    """
+
+    if not app_settings.github.token:
+        raise ValueError('GitHub token is missing from environment variables.')
+
+    client = Github(
+        base_url=app_settings.github.api_url,
+        auth=Auth.Token(app_settings.github.token),
+        pool_size=workers,
+    )
+    sweep = FleetSweep(
+        client=client,
+        budget=RateLimitBudget(client, reserve=rate_limit_reserve),
+        branches=branches or app_settings.release_branches,
+        cache_dir=cache_dir,
+    )
+
+    server = urlparse(app_settings.github.server_url)
+
+    with (git_auth_environment(f'{server.scheme}://{server.netloc}/', app_settings.github.token),
+          ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fleet') as executor):
+        list(executor.map(sweep.sweep_repository, repositories))
+
+    return sorted(sweep.results, key=lambda r: (r.repository, r.branch))
+
+
+def format_table_cell(text: str, max_length: int = 200):
+    """Make `text` safe for a single markdown table cell: one line, escaped pipes, truncated"""
+
+    text = ' '.join(text.split()).replace('|', '\\|')
+    return text if len(text) <= max_length else text[:max_length - 1].rstrip('\\') + '…'
+
+
+def format_summary(results: list[BranchResult]):
+    counts = {status: sum(r.status == status for r in results) for status in ('updated', 'skipped', 'failed')}
+    lines = [
+        '| Repository | Branch | Status | Detail |',
+        '| --- | --- | --- | --- |',
+        *(f'| {r.repository} | {r.branch} | {r.status} | {format_table_cell(r.detail)} |' for r in results),
+        '',
+        ', '.join(f'{count} {status}' for status, count in counts.items()),
+    ]
+    return '\n'.join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m streamlined_releases.fleet',
+        description='Refresh release candidate pull requests across many repositories.',
+    )
+    parser.add_argument('repositories', nargs='*', help='repositories to sweep, as owner/name')
+    parser.add_argument('--repos-file', type=Path, help='file listing repositories to sweep, one per line')
+    parser.add_argument('--branches', nargs='+', help='release branches to sweep (default: %(default)s)',
+                        default=app_settings.release_branches)
+    parser.add_argument('--workers', type=int, default=4, help='number of concurrent workers (default: %(default)s)')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                        help='directory holding the cached partial clones (default: %(default)s)')
+    parser.add_argument('--rate-limit-reserve', type=int, default=100,
+                        help='pause all workers once this many API requests remain (default: %(default)s)')
+
+    args = parser.parse_args(argv)
+
+    if args.repos_file:
+        for line in args.repos_file.read_text().splitlines():
+            if (line := line.split('#', 1)[0].strip()):
+                args.repositories.append(line)
+
+    if not args.repositories:
+        parser.error('no repositories given')
+
+    # preserve order, drop duplicates
+    args.repositories = list(dict.fromkeys(args.repositories))
+    return args
+
+
+def main(argv: Optional[list[str]] = None):
+    setup_logging()
+    args = parse_args(argv)
+
+    logger.info('-- Streamlined Releases: fleet sweep --')
+    logger.info('Sweeping %s repositories on branches %s', len(args.repositories), args.branches)
+
+    results = sweep_repositories(
+        repositories=args.repositories,
+        branches=args.branches,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        rate_limit_reserve=args.rate_limit_reserve,
+    )
+
+    summary = format_summary(results)
+    logger.info('Fleet sweep summary:\n%s', summary)
+
+    if app_settings.github.step_summary:
+        with app_settings.github.step_summary.open('a') as fp:
+            fp.write(f'## Fleet sweep\n\n{summary}\n')
+
+    return 1 if any(r.status == 'failed' for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
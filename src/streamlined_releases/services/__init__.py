@@ -1,2 +1,5 @@
+from .changelog import *
 from .git import *
 from .github import *
+from .history import *
+from .tags import *
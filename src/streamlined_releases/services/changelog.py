@@ -0,0 +1,125 @@
+import re
+from logging import getLogger
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TextIO
+
+logger = getLogger(__name__)
+
+__all__ = [
+    "GITHUB_PULL_REQUEST_BODY_MAX_LENGTH",
+    "GITHUB_RELEASE_BODY_MAX_LENGTH",
+    "build_changelog_body",
+    "iter_changelog_sections",
+    "truncate_changelog_section",
+]
+
+# GitHub rejects bodies longer than these (measured in characters)
+GITHUB_RELEASE_BODY_MAX_LENGTH = 125_000
+GITHUB_PULL_REQUEST_BODY_MAX_LENGTH = 65_536
+
+SECTION_HEADING_PATTERN = re.compile(r'^#{1,6}\s')
+SECTION_ENTRY_PATTERN = re.compile(r'^\s*[-*]\s')
+TRUNCATION_NOTICE_TEMPLATE = '\n\n---\n\n> [!NOTE]\n> Changelog truncated, see the [full changelog]({url}).\n'
+TRUNCATION_NOTICE_NO_LINK = '\n\n---\n\n> [!NOTE]\n> Changelog truncated.\n'
+
+
+def iter_changelog_sections(fp: TextIO) -> Iterator[str]:
+    """
+    Lazily yield the sections of a rendered changelog, each starting at a markdown heading.
+
+    A heading only closes the current section once it holds at least one entry,
+    so release headings stay attached to their first group of commits.
+    """
+
+    section: list[str] = []
+    has_entries = False
+
+    for line in fp:
+        if SECTION_HEADING_PATTERN.match(line) and has_entries:
+            yield ''.join(section)
+            section = []
+            has_entries = False
+
+        section.append(line)
+        has_entries = has_entries or bool(SECTION_ENTRY_PATTERN.match(line))
+
+    if section:
+        yield ''.join(section)
+
+
+def truncate_changelog_section(section: str, max_length: int):
+    """
+    Cut a single section at whole entries, keeping its heading(s) and preamble.
+    Returns an empty string when not even the headings fit.
+    """
+
+    lines = section.splitlines(keepends=True)
+    first_entry = next((i for i, line in enumerate(lines) if SECTION_ENTRY_PATTERN.match(line)), len(lines))
+    kept = ''.join(lines[:first_entry])
+
+    if len(kept) > max_length:
+        return ''
+
+    entry = ''
+    for line in lines[first_entry:]:
+        # an entry spans its line and any continuation lines up to the next entry
+        if SECTION_ENTRY_PATTERN.match(line) and entry:
+            if len(kept) + len(entry) > max_length:
+                return kept
+            kept += entry
+            entry = ''
+        entry += line
+
+    return kept + entry if len(kept) + len(entry) <= max_length else kept
+
+
+def build_changelog_body(changelog_filepath: Path,
+                         max_length: int,
+                         full_changelog_url: Optional[str] = None,
+                         transform: Optional[Callable[[str], str]] = None):
+    """
+    Build a release/pull request body from a rendered changelog file, keeping it under `max_length` characters.
+
+    The file is streamed section by section, and once the next section no longer fits the body is cut there
+    and a link to `full_changelog_url` is appended instead.
+    When not even the first section fits, it is cut at whole entries so its heading is kept.
+    `transform` is applied to each section before it is measured.
+
+    Returns:
+      A tuple of the body and whether it was truncated.
+    """
+
+    notice = (
+        TRUNCATION_NOTICE_TEMPLATE.format(url=full_changelog_url)
+        if full_changelog_url
+        else TRUNCATION_NOTICE_NO_LINK
+    )
+    sections: list[str] = []
+    length = 0
+
+    with changelog_filepath.open('r', encoding='utf-8') as fp:
+        for section in iter_changelog_sections(fp):
+            if transform:
+                section = transform(section)
+
+            if length + len(section) > max_length:
+                if not sections:
+                    sections.append(truncate_changelog_section(section, max_length - len(notice)))
+                    length = len(sections[0])
+                break
+
+            sections.append(section)
+            length += len(section)
+
+        else:
+            return ''.join(sections).strip(), False
+
+    # drop trailing sections until the truncation notice fits
+    while sections and length + len(notice) > max_length:
+        length -= len(sections.pop())
+
+    logger.warning(
+        "Changelog exceeds %s characters, truncated to %s characters (link: '%s')",
+        max_length, length, full_changelog_url,
+    )
+    return ''.join(sections).rstrip() + notice, True
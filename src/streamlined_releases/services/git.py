@@ -1,15 +1,18 @@
 import subprocess
 from logging import getLogger
+from pathlib import Path
 from typing import Literal, Optional
 
 import git
 
-from ..settings import app_settings
+from ..settings import GithubEnv, app_settings
+from .history import branch_exists
 
 logger = getLogger(__name__)
 
 __all__ = [
     "bump_version",
+    "exclude_from_git",
     "generate_gitcliff_changelog_file",
     "get_gitcliff_bumped_version",
     "get_gitcliff_changelog_diff",
@@ -24,7 +27,17 @@ def get_gitcliff_changelog_diff(
     strip: Optional[Literal['header', 'footer', 'all']] = None,
     prepend: bool = False,
     to_file: bool = False,
+    output_filepath: Optional[Path] = None,
+    github_env: Optional[GithubEnv] = None,
 ):
+    """
+    Render the changelog diff using `git-cliff`.
+
+    When `output_filepath` is given the changelog is written there instead of being returned,
+    so large changelogs never have to be held in memory.
+    """
+
+    github_env = github_env or app_settings.github
     args = ['git-cliff']
 
     if bump:
@@ -39,12 +52,14 @@ def get_gitcliff_changelog_diff(
     if prepend:
         args.extend(['--prepend', app_settings.changelog_filepath.as_posix()])
 
-    if to_file:
+    if output_filepath:
+        args.extend(['--output', output_filepath.as_posix()])
+    elif to_file:
         args.extend(['--output', app_settings.changelog_filepath.as_posix()])
 
     try:
         res = subprocess.run(
-            # cwd=app_settings.github.workspace,
+            cwd=github_env.workspace,
             args=args,
             check=True,
             capture_output=True,
@@ -60,10 +75,11 @@ def get_gitcliff_changelog_diff(
         raise
 
 
-def generate_gitcliff_changelog_file():
+def generate_gitcliff_changelog_file(github_env: Optional[GithubEnv] = None):
+    github_env = github_env or app_settings.github
     cmd = ['git-cliff', '--bump']
 
-    if not app_settings.changelog_filepath.exists():
+    if not (github_env.workspace or Path()).joinpath(app_settings.changelog_filepath).exists():
         # create a new changelog file
         cmd.extend([
             '-o', app_settings.changelog_filepath.as_posix(),
@@ -78,6 +94,7 @@ def generate_gitcliff_changelog_file():
     try:
         res = subprocess.run(
             cmd,
+            cwd=github_env.workspace,
             check=True,
             capture_output=True,
             text=True,
@@ -91,11 +108,24 @@ def generate_gitcliff_changelog_file():
         raise
 
 
-def get_gitcliff_bumped_version():
+def get_gitcliff_bumped_version(unreleased: bool = True, github_env: Optional[GithubEnv] = None):
+    """
+    Get the next version using `git-cliff`.
+
+    With `unreleased` git-cliff only walks the commits since the last release tag,
+    instead of rendering every release in the history just to bump the latest one.
+    """
+
+    github_env = github_env or app_settings.github
+    args = ['git-cliff', '--bumped-version']
+
+    if unreleased:
+        args.append('--unreleased')
+
     try:
         res = subprocess.run(
-            # cwd=app_settings.github.workspace,
-            args=['git-cliff', '--bumped-version'],
+            cwd=github_env.workspace,
+            args=args,
             check=True,
             capture_output=True,
             text=True,
@@ -109,15 +139,12 @@ def get_gitcliff_bumped_version():
         raise
 
 
-def upsert_branch(branch_name: str, base_ref: str):
-    repo = git.Repo(app_settings.github.workspace)
+def upsert_branch(branch_name: str, base_ref: str, github_env: Optional[GithubEnv] = None):
+    github_env = github_env or app_settings.github
 
-    try:
-        # Try to get the branch, catch IndexError if it doesn't exist
-        _branch = repo.branches[branch_name]
-
-    except IndexError:
+    if not branch_exists(branch_name, github_env=github_env):
         # If it doesn't exist, create it from the base ref
+        repo = git.Repo(github_env.workspace)
         logger.info("Creating branch '%s' from base ref '%s'", branch_name, base_ref)
         repo.git.checkout(base_ref, b=branch_name)
         repo.git.push('origin', '-u', branch_name)
@@ -125,6 +152,39 @@ def upsert_branch(branch_name: str, base_ref: str):
     return branch_name
 
 
+def exclude_from_git(path: Path, github_env: Optional[GithubEnv] = None):
+    """Add `path` to the workspace's `.git/info/exclude` when it lives inside the working tree"""
+
+    github_env = github_env or app_settings.github
+
+    if not github_env.workspace:
+        return
+
+    try:
+        relative = path.resolve().relative_to(github_env.workspace.resolve())
+    except ValueError:
+        # outside the working tree, nothing to exclude
+        return
+
+    res = subprocess.run(
+        args=['git', 'rev-parse', '--path-format=absolute', '--git-path', 'info/exclude'],
+        cwd=github_env.workspace,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    exclude_filepath = Path(res.stdout.strip())
+    pattern = f'/{relative.as_posix()}/'
+
+    if exclude_filepath.exists() and pattern in exclude_filepath.read_text().splitlines():
+        return
+
+    logger.debug("Excluding '%s' from git in '%s'", pattern, exclude_filepath)
+    exclude_filepath.parent.mkdir(parents=True, exist_ok=True)
+    with exclude_filepath.open('a') as fp:
+        fp.write(f'\n{pattern}\n')
+
+
 def set_git_safe_directory(dir: str):
     subprocess.run(
         args=['git', 'config', '--global', '--add', 'safe.directory', dir],
@@ -138,17 +198,20 @@ def bump_version(version: str,
                  target_ref: str,
                  do_commit: bool = True,
                  commit_changelog: bool = True,
-                 commit_force: bool = False):
+                 commit_force: bool = False,
+                 github_env: Optional[GithubEnv] = None):
     """Bump the version in the current branch using `uv version`"""
 
+    github_env = github_env or app_settings.github
+
     # checkout the target branch
-    repo = git.Repo(app_settings.github.workspace)
+    repo = git.Repo(github_env.workspace)
     repo.git.checkout(target_ref)
 
     try:
         # do the bump
         res = subprocess.run(
-            cwd=app_settings.github.workspace,
+            cwd=github_env.workspace,
             args=[
                 'uv', 'version', '--frozen', '--short', version,
             ],
@@ -168,7 +231,7 @@ def bump_version(version: str,
         if commit_changelog:
             # generate the changelog
             logger.info('Generating changelog for version %s', version)
-            generate_gitcliff_changelog_file()
+            generate_gitcliff_changelog_file(github_env=github_env)
 
         # commit changes if working tree is dirty
         if not repo.is_dirty():
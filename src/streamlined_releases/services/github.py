@@ -1,7 +1,8 @@
 import re
 from logging import getLogger
+from typing import Optional
 
-from ..settings import app_settings
+from ..settings import GithubEnv, app_settings
 
 logger = getLogger(__name__)
 
@@ -18,9 +19,15 @@ def set_github_action_output(**kwargs):
             fp.write(f'{k}={v}')
 
 
-def create_pull_request(head_ref: str, base_ref: str, title: str, body: str = None, **kwargs):
-    gh = app_settings.github.get_client()
-    repo = gh.get_repo(app_settings.github.repository)
+def create_pull_request(head_ref: str,
+                        base_ref: str,
+                        title: str,
+                        body: str = None,
+                        github_env: Optional[GithubEnv] = None,
+                        **kwargs):
+    github_env = github_env or app_settings.github
+    gh = github_env.get_client()
+    repo = gh.get_repo(github_env.repository)
 
     logger.info("Creating pull request '%s' from '%s' to '%s'", title, head_ref, base_ref)
     pr = repo.create_pull(
@@ -34,9 +41,10 @@ def create_pull_request(head_ref: str, base_ref: str, title: str, body: str = No
     return pr
 
 
-def is_rc_commit(sha: str):
-    gh = app_settings.github.get_client()
-    repo = gh.get_repo(app_settings.github.repository)
+def is_rc_commit(sha: str, github_env: Optional[GithubEnv] = None):
+    github_env = github_env or app_settings.github
+    gh = github_env.get_client()
+    repo = gh.get_repo(github_env.repository)
 
     commit = repo.get_commit(sha)
     prs = commit.get_pulls()
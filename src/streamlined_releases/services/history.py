@@ -0,0 +1,217 @@
+import subprocess
+import threading
+from logging import getLogger
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ..settings import GithubEnv, app_settings
+
+logger = getLogger(__name__)
+
+__all__ = [
+    "CommitRecord",
+    "CommitStream",
+    "branch_exists",
+    "ensure_commit_graph",
+    "iter_commit_shas",
+    "iter_commits",
+]
+
+
+class CommitRecord:
+    __slots__ = ('sha', 'parents', 'author_name', 'author_email', 'timestamp', 'subject')
+
+    def __init__(self, sha: str, parents: tuple[str, ...], author_name: str, author_email: str, timestamp: int,
+                 subject: str):
+        self.sha = sha
+        self.parents = parents
+        self.author_name = author_name
+        self.author_email = author_email
+        self.timestamp = timestamp
+        self.subject = subject
+
+    def __repr__(self):
+        return f'CommitRecord({self.sha[:7]!r}, {self.subject!r})'
+
+    @classmethod
+    def parse(cls, sha: str, raw: bytes):
+        headers, _, message = raw.partition(b'\n\n')
+        parents = []
+        author_name = author_email = ''
+        timestamp = 0
+
+        for line in headers.split(b'\n'):
+            key, _, value = line.partition(b' ')
+
+            if key == b'parent':
+                parents.append(value.decode())
+
+            elif key == b'author':
+                # 'Name <email> 1700000000 +0000'
+                ident, _, date = value.decode(errors='replace').rpartition('> ')
+                author_name, _, author_email = ident.partition(' <')
+                timestamp = int(date.split(' ', 1)[0])
+
+        subject = message.split(b'\n', 1)[0].decode(errors='replace').strip()
+        return cls(sha, tuple(parents), author_name, author_email, timestamp, subject)
+
+
+class CommitStream:
+    """
+    A persistent `git cat-file --batch` process, reading commit objects on demand.
+    Use as a context manager to close the process once done.
+    """
+
+    def __init__(self, workspace: Optional[Path] = None):
+        self.workspace = workspace
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            args=['git', 'cat-file', '--batch'],
+            cwd=workspace,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, sha: str):
+        with self._lock:
+            self._proc.stdin.write(f'{sha}\n'.encode())
+            self._proc.stdin.flush()
+
+            header = self._proc.stdout.readline().decode().split()
+            if len(header) == 3:
+                raw = self._proc.stdout.read(int(header[2]))
+                self._proc.stdout.read(1)  # trailing newline
+
+            # checked only after the payload was consumed, so the stream stays in sync for the next read
+            if len(header) != 3 or header[1] != 'commit':
+                raise ValueError(f"'{sha}' is not a commit object in '{self.workspace}': {' '.join(header)}")
+
+        return CommitRecord.parse(header[0], raw)
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_commit_shas(rev: str = 'HEAD',
+                     stop_at: Optional[str] = None,
+                     first_parent: bool = False,
+                     github_env: Optional[GithubEnv] = None) -> Iterator[str]:
+    """
+    Lazily walk the commit ids of `rev`, newest first, excluding everything reachable from `stop_at`.
+
+    Commit ids are streamed from `git rev-list` as the caller consumes them,
+    so stopping early never walks (or holds) the rest of the history.
+
+    Raises:
+      subprocess.CalledProcessError: if `git rev-list` fails, i.e. on a bad revision or missing objects.
+    """
+
+    github_env = github_env or app_settings.github
+    args = ['git', 'rev-list']
+
+    if first_parent:
+        args.append('--first-parent')
+
+    args.append(rev)
+
+    if stop_at:
+        args.append(f'^{stop_at}')
+
+    proc = subprocess.Popen(
+        args=args,
+        cwd=github_env.workspace,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    exhausted = False
+
+    try:
+        for line in proc.stdout:
+            yield line.strip()
+
+        exhausted = True
+
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None and not exhausted:
+            # the caller stopped early
+            proc.terminate()
+
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        proc.wait()
+
+    if proc.returncode != 0:
+        logger.error('Failed to walk the history of %s', rev)
+        logger.error('stderr: %s', stderr)
+        raise subprocess.CalledProcessError(proc.returncode, args, stderr=stderr)
+
+
+def iter_commits(rev: str = 'HEAD',
+                 stop_at: Optional[str] = None,
+                 first_parent: bool = False,
+                 github_env: Optional[GithubEnv] = None) -> Iterator[CommitRecord]:
+    """
+    Like `iter_commit_shas`, reading each commit through a single `git cat-file --batch` process
+    only as the caller consumes it.
+    """
+
+    github_env = github_env or app_settings.github
+
+    with CommitStream(github_env.workspace) as stream:
+        for sha in iter_commit_shas(rev, stop_at, first_parent, github_env=github_env):
+            yield stream.read(sha)
+
+
+def ensure_commit_graph(github_env: Optional[GithubEnv] = None):
+    """
+    Write (or incrementally extend) the commit-graph with changed-path Bloom filters for the workspace,
+    and keep it maintained by later fetches.
+    """
+
+    github_env = github_env or app_settings.github
+
+    try:
+        for key, value in (('core.commitGraph', 'true'), ('fetch.writeCommitGraph', 'true')):
+            subprocess.run(
+                args=['git', 'config', key, value],
+                cwd=github_env.workspace,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+
+        # '--split' only appends the commits missing from the existing graph layers
+        subprocess.run(
+            args=['git', 'commit-graph', 'write', '--reachable', '--changed-paths', '--split'],
+            cwd=github_env.workspace,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+    except subprocess.CalledProcessError as exc:
+        # the graph is purely an optimization, history walks still work without it
+        logger.warning('Failed to write commit-graph: %s', exc.stderr.strip())
+
+
+def branch_exists(branch_name: str, github_env: Optional[GithubEnv] = None):
+    """Look up a single local branch ref, without listing every branch in the repository"""
+
+    github_env = github_env or app_settings.github
+
+    res = subprocess.run(
+        args=['git', 'show-ref', '--verify', '--quiet', f'refs/heads/{branch_name}'],
+        cwd=github_env.workspace,
+        capture_output=True,
+    )
+    return res.returncode == 0
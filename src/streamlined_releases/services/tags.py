@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import Optional
+
+from ..settings import GithubEnv, app_settings
+from .git import exclude_from_git
+from .history import iter_commit_shas
+
+logger = getLogger(__name__)
+
+__all__ = [
+    "TagEntry",
+    "TagIndex",
+    "get_tag_index",
+    "get_tag_refs_fingerprint",
+]
+
+SEMVER_TAG_PATTERN = re.compile(
+    r'^(?P<prefix>.*?)'
+    r'(?P<major>0|[1-9]\d*)\.(?P<minor>0|[1-9]\d*)\.(?P<patch>0|[1-9]\d*)'
+    r'(?:-(?P<prerelease>[0-9A-Za-z.-]+))?'
+    r'(?:\+[0-9A-Za-z.-]+)?$'
+)
+
+
+@dataclass(slots=True)
+class TagEntry:
+    name: str
+    sha: str
+    prefix: str
+    key: tuple
+    prerelease: bool
+
+    @classmethod
+    def parse(cls, name: str, sha: str):
+        """Parse a semver tag name such as `v1.2.3`, `pkg-a/v1.2.3-rc.1`, `None` for non semver tags"""
+
+        if not (m := SEMVER_TAG_PATTERN.match(name)):
+            return None
+
+        prerelease = m.group('prerelease')
+        # releases sort after their pre-releases, numeric identifiers sort numerically
+        prerelease_key = (1,) if prerelease is None else (0, *(
+            (0, int(part), '') if part.isdigit() else (1, 0, part)
+            for part in prerelease.split('.')
+        ))
+        key = (int(m.group('major')), int(m.group('minor')), int(m.group('patch')), prerelease_key)
+
+        return cls(name, sha, m.group('prefix'), key, prerelease is not None)
+
+
+@dataclass
+class TagIndex:
+    """
+    Semver tags of a repository, sorted per tag prefix.
+
+    Persisted as json under the data directory along with a fingerprint of the tag refs,
+    so it is only re-synced (and re-saved) when the refs changed.
+    """
+
+    filepath: Path
+    refs_fingerprint: str = ''
+    by_name: dict[str, TagEntry] = field(default_factory=dict)
+    by_prefix: dict[str, list[TagEntry]] = field(default_factory=dict)
+    by_sha: dict[str, list[TagEntry]] = field(default_factory=dict)
+    dirty: bool = False
+
+    @classmethod
+    def load(cls, filepath: Path):
+        index = cls(filepath)
+
+        if filepath.exists():
+            try:
+                data = json.loads(filepath.read_text())
+                index.add_many(data['tags'])
+                index.refs_fingerprint = data['refs_fingerprint']
+
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning("Ignoring corrupt tag index '%s': %r", filepath, exc)
+                index = cls(filepath)
+
+        index.dirty = False
+        return index
+
+    def save(self):
+        if not self.dirty:
+            logger.debug("Tag index '%s' is up to date", self.filepath)
+            return
+
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filepath = self.filepath.with_suffix('.tmp')
+        tmp_filepath.write_text(json.dumps({
+            'refs_fingerprint': self.refs_fingerprint,
+            'tags': [[e.name, e.sha] for e in self.by_name.values()],
+        }))
+        tmp_filepath.replace(self.filepath)
+        self.dirty = False
+
+    def add_many(self, tags: list[tuple[str, str]]):
+        """Add (or move) many tags at once, sorting each touched prefix only once"""
+
+        touched = set()
+
+        for name, sha in tags:
+            self.remove(name)
+
+            if (entry := TagEntry.parse(name, sha)) is None:
+                continue
+
+            self.by_name[name] = entry
+            self.by_prefix.setdefault(entry.prefix, []).append(entry)
+            self.by_sha.setdefault(sha, []).append(entry)
+            touched.add(entry.prefix)
+            self.dirty = True
+
+        for prefix in touched:
+            self.by_prefix[prefix].sort(key=lambda e: e.key)
+
+    def remove(self, name: str):
+        if (entry := self.by_name.pop(name, None)) is None:
+            return
+
+        self.by_prefix[entry.prefix].remove(entry)
+        self.by_sha[entry.sha].remove(entry)
+        self.dirty = True
+
+    def exists(self, name: str):
+        return name in self.by_name
+
+    def nearest_release(self,
+                        rev: str = 'HEAD',
+                        prefix: Optional[str] = None,
+                        include_prereleases: bool = False,
+                        github_env: Optional[GithubEnv] = None):
+        """
+        Get the nearest release tag reachable from `rev`, walking the history only back to that tag.
+        When a commit carries several matching tags, the highest version wins.
+
+        A release tag is any non pre-release semver tag with `prefix` (any prefix when `None`,
+        which mixes the tags of different packages in a monorepo).
+        """
+
+        entries = self.by_name.values() if prefix is None else self.by_prefix.get(prefix, [])
+        if not any(include_prereleases or not entry.prerelease for entry in entries):
+            # nothing could match, don't walk the whole history for it
+            return None
+
+        # only the ids are needed, no need to read the commits themselves
+        for sha in iter_commit_shas(rev, github_env=github_env):
+            candidates = [
+                entry for entry in self.by_sha.get(sha, [])
+                if (prefix is None or entry.prefix == prefix) and (include_prereleases or not entry.prerelease)
+            ]
+            if candidates:
+                return max(candidates, key=lambda e: e.key)
+
+        return None
+
+    def update_from_refs(self, github_env: Optional[GithubEnv] = None):
+        """
+        Sync with the local tag refs (packed and loose), skipped entirely when their fingerprint is unchanged.
+        Otherwise only the tags that were added, moved or deleted are touched.
+        """
+
+        github_env = github_env or app_settings.github
+
+        if (fingerprint := get_tag_refs_fingerprint(github_env=github_env)) == self.refs_fingerprint:
+            logger.debug('Tag refs unchanged, skipping tag index sync')
+            return
+
+        res = subprocess.run(
+            # '*objectname' peels annotated tags to their commit
+            args=['git', 'for-each-ref', '--format=%(refname:strip=2) %(objectname) %(*objectname)', 'refs/tags'],
+            cwd=github_env.workspace,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+        refs = {}
+        for line in res.stdout.splitlines():
+            name, sha, peeled_sha = (line.split(' ') + [''])[:3]
+            refs[name] = peeled_sha or sha
+
+        added = [(name, sha) for name, sha in refs.items() if getattr(self.by_name.get(name), 'sha', None) != sha]
+        removed = [name for name in self.by_name if name not in refs]
+
+        self.add_many(added)
+        for name in removed:
+            self.remove(name)
+
+        self.refs_fingerprint = fingerprint
+        self.dirty = True
+        logger.debug('Tag index synced with local refs: %s added/moved, %s removed', len(added), len(removed))
+
+
+def get_tag_refs_fingerprint(github_env: Optional[GithubEnv] = None):
+    """Fingerprint the tag refs from the file stats of `packed-refs` and the loose tag refs, without reading them"""
+
+    github_env = github_env or app_settings.github
+
+    res = subprocess.run(
+        args=['git', 'rev-parse', '--path-format=absolute', '--git-common-dir'],
+        cwd=github_env.workspace,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    git_dir = Path(res.stdout.strip())
+    digest = hashlib.sha1()
+
+    for path in [git_dir / 'packed-refs', *sorted((git_dir / 'refs' / 'tags').rglob('*'))]:
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f'{os.path.relpath(path, git_dir)}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+
+    return digest.hexdigest()
+
+
+def get_tag_index(github_env: Optional[GithubEnv] = None):
+    """Load the persisted tag index of the repository, bring it up to date and save it if it changed"""
+
+    github_env = github_env or app_settings.github
+    filepath = app_settings.data_dir / 'tag-index' / f'{github_env.repository}.json'
+
+    index = TagIndex.load(filepath)
+    index.update_from_refs(github_env=github_env)
+
+    if index.dirty:
+        exclude_from_git(app_settings.data_dir, github_env=github_env)
+        index.save()
+
+    return index
@@ -1,13 +1,16 @@
 import json
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal, NamedTuple, Optional
+from typing import Callable, Literal, NamedTuple, Optional
 
 from github import Auth, Github
-from pydantic import Field, computed_field, model_validator
+from pydantic import Field, PrivateAttr, computed_field, model_validator
 from pydantic_settings import BaseSettings
 
+PACKAGE_DATA_DIR = Path(__file__).parent.parent.parent / 'data'
+
 __all__ = [
+    "GithubEnv",
     "Settings",
     "app_settings",
 ]
@@ -25,6 +28,7 @@ class Inputs(BaseSettings):
     git_email: Optional[str] = None
     bump_commit_message: Optional[str] = None
     changelog_filepath: Optional[Path] = None
+    data_dir: Optional[Path] = None
     main_branch: Optional[str] = None
     staging_branch: Optional[str] = None
     dev_branch: Optional[str] = None
@@ -78,6 +82,9 @@ class GithubEnv(BaseSettings):
     workflow: Optional[str] = None
     workspace: Optional[Path] = None
 
+    _client: Optional[Github] = PrivateAttr(default=None)
+    _on_get_client: Optional[Callable[[], None]] = PrivateAttr(default=None)
+
     def __hash__(self):
         """Override hash to allow caching."""
         d = self.model_dump(exclude_none=True)
@@ -107,8 +114,28 @@ class GithubEnv(BaseSettings):
         pr_payload: dict = self.event_payload.get('pull_request', {})
         return pr_payload.get('merged', None)
 
-    @lru_cache(maxsize=1)
+    def with_client(self, client: Github, on_get_client: Optional[Callable[[], None]] = None, **overrides):
+        """
+        Copy this environment with `overrides` applied, sharing an already configured `client`.
+        `on_get_client` is called every time the client is handed out by `get_client`,
+        not before every request made with it.
+        """
+
+        env = self.model_copy(update=overrides)
+        env._client = client
+        env._on_get_client = on_get_client
+        return env
+
     def get_client(self):
+        if self._client is not None:
+            if self._on_get_client is not None:
+                self._on_get_client()
+            return self._client
+
+        return self._create_client()
+
+    @lru_cache(maxsize=1)
+    def _create_client(self):
         if not self.token:
             raise ValueError('GitHub token is missing from environment variables.')
 
@@ -125,6 +152,9 @@ class Settings(BaseSettings):
     }
 
     runner_debug: bool = False
+    # defaults to a directory under the workspace (see `_apply_input_overrides`), so workflows can cache it.
+    # it is added to the workspace's `.git/info/exclude` before anything is written there
+    data_dir: Optional[Path] = None
     changelog_filepath: Path = 'CHANGELOG.md'
     bump_commit_actor: ActorTuple = ('github-actions[bot]', 'github-actions[bot]@users.noreply.github.com')
     bump_commit_message: str = 'chore(release): Bumped version to {version}'
@@ -142,6 +172,7 @@ class Settings(BaseSettings):
             'bump_commit_actor',
             'bump_commit_message',
             'changelog_filepath',
+            'data_dir',
             'dev_branch',
             'main_branch',
             'staging_branch',
@@ -152,6 +183,13 @@ class Settings(BaseSettings):
                 if v := getattr(self.inputs, field, None):
                     setattr(self, field, v)
 
+        if self.data_dir is None:
+            self.data_dir = (
+                self.github.workspace / '.streamlined-releases'
+                if self.github.workspace
+                else PACKAGE_DATA_DIR
+            )
+
         return self
 
     @property